@@ -8,6 +8,8 @@ import os
 import sys
 import json
 import time
+import functools
+import string
 import subprocess
 from pathlib import Path
 from datetime import datetime
@@ -24,102 +26,57 @@ BLUE = '\033[0;34m'
 YELLOW = '\033[1;33m'
 NC = '\033[0m'
 
-class VercelDeployer:
-    def __init__(self, base_dir):
-        self.base_dir = Path(base_dir)
-        self.env_file = self.base_dir / "learnflow-app" / ".env.backend"
-        self.env_vars = {}
-        self.deployment_url = None
 
-    def log(self, level, message):
-        """Log with color"""
-        if level == "info":
-            print(f"{BLUE}ℹ️  {message}{NC}")
-        elif level == "success":
-            print(f"{GREEN}✅ {message}{NC}")
-        elif level == "error":
-            print(f"{RED}❌ {message}{NC}")
-        elif level == "warning":
-            print(f"{YELLOW}⚠️  {message}{NC}")
-        else:
-            print(f"{BLUE}→  {message}{NC}")
+@functools.lru_cache(maxsize=4)
+def _parse_env(path_str, mtime):
+    """Parse KEY=VALUE lines once per file version (mtime is the cache key)"""
+    env_vars = {}
+    with open(path_str) as f:
+        for line in f:
+            if "=" in line and not line.strip().startswith("#"):
+                key, val = line.strip().split("=", 1)
+                env_vars[key] = val
+    return env_vars
 
-    def load_env_vars(self):
-        """Load secrets from .env.backend"""
-        self.log("info", "Loading environment variables...")
 
-        if not self.env_file.exists():
-            self.log("error", f".env.backend not found at {self.env_file}")
-            return False
+def _list_dir(path, prefix=""):
+    """Return entry names in a directory (empty if it cannot be listed)"""
+    try:
+        with os.scandir(path) as it:
+            return {prefix + entry.name for entry in it}
+    except OSError:
+        return set()
 
-        with open(self.env_file) as f:
-            for line in f:
-                if "=" in line and not line.strip().startswith("#"):
-                    key, val = line.strip().split("=", 1)
-                    self.env_vars[key] = val
 
-        required = ["DATABASE_URL", "OPENAI_API_KEY", "JWT_SECRET"]
-        for var in required:
-            if var not in self.env_vars:
-                self.log("error", f"Missing required var: {var}")
-                return False
-            self.log("success", f"Loaded {var}")
-
-        return True
-
-    def run_command(self, cmd, description=""):
-        """Run shell command and return output"""
-        if description:
-            self.log("info", description)
-
-        try:
-            result = subprocess.run(
-                cmd,
-                shell=True,
-                capture_output=True,
-                text=True,
-                timeout=30
-            )
-            return result.stdout.strip(), result.returncode
-        except subprocess.TimeoutExpired:
-            self.log("error", f"Command timeout: {cmd}")
-            return "", 1
-        except Exception as e:
-            self.log("error", f"Command failed: {e}")
-            return "", 1
-
-    def generate_deployment_report(self):
-        """Generate HTML report of deployment status"""
-        timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-
-        report = f"""
+# Deployment report page; $timestamp and $project are filled per call
+_REPORT_TMPL = string.Template("""
 <!DOCTYPE html>
 <html>
 <head>
     <title>Fatima Zehra Boutique - Vercel Deployment Report</title>
     <style>
-        body {{ font-family: -apple-system, BlinkMacSystemFont, 'Segoe UI', Roboto, sans-serif; margin: 40px; }}
-        .header {{ color: #333; border-bottom: 2px solid #007bff; padding-bottom: 20px; }}
-        .status {{ padding: 20px; margin: 20px 0; border-radius: 8px; }}
-        .success {{ background: #d4edda; border: 1px solid #c3e6cb; color: #155724; }}
-        .error {{ background: #f8d7da; border: 1px solid #f5c6cb; color: #721c24; }}
-        .warning {{ background: #fff3cd; border: 1px solid #ffeaa7; color: #856404; }}
-        .section {{ margin: 30px 0; }}
-        .section h2 {{ color: #007bff; border-left: 4px solid #007bff; padding-left: 10px; }}
-        table {{ width: 100%; border-collapse: collapse; margin: 20px 0; }}
-        th, td {{ padding: 12px; text-align: left; border-bottom: 1px solid #ddd; }}
-        th {{ background: #f8f9fa; font-weight: bold; }}
-        .check {{ color: green; font-weight: bold; }}
-        .cross {{ color: red; font-weight: bold; }}
-        code {{ background: #f4f4f4; padding: 2px 6px; border-radius: 3px; font-family: monospace; }}
-        .endpoint {{ background: #f8f9fa; padding: 15px; margin: 10px 0; border-left: 4px solid #007bff; }}
+        body { font-family: -apple-system, BlinkMacSystemFont, 'Segoe UI', Roboto, sans-serif; margin: 40px; }
+        .header { color: #333; border-bottom: 2px solid #007bff; padding-bottom: 20px; }
+        .status { padding: 20px; margin: 20px 0; border-radius: 8px; }
+        .success { background: #d4edda; border: 1px solid #c3e6cb; color: #155724; }
+        .error { background: #f8d7da; border: 1px solid #f5c6cb; color: #721c24; }
+        .warning { background: #fff3cd; border: 1px solid #ffeaa7; color: #856404; }
+        .section { margin: 30px 0; }
+        .section h2 { color: #007bff; border-left: 4px solid #007bff; padding-left: 10px; }
+        table { width: 100%; border-collapse: collapse; margin: 20px 0; }
+        th, td { padding: 12px; text-align: left; border-bottom: 1px solid #ddd; }
+        th { background: #f8f9fa; font-weight: bold; }
+        .check { color: green; font-weight: bold; }
+        .cross { color: red; font-weight: bold; }
+        code { background: #f4f4f4; padding: 2px 6px; border-radius: 3px; font-family: monospace; }
+        .endpoint { background: #f8f9fa; padding: 15px; margin: 10px 0; border-left: 4px solid #007bff; }
     </style>
 </head>
 <body>
     <div class="header">
         <h1>🛍️ Fatima Zehra Boutique - Vercel Deployment Report</h1>
-        <p><strong>Generated:</strong> {timestamp}</p>
-        <p><strong>Project:</strong> {PROJECT_NAME}</p>
+        <p><strong>Generated:</strong> $timestamp</p>
+        <p><strong>Project:</strong> $project</p>
     </div>
 
     <div class="section">
@@ -144,7 +101,7 @@ class VercelDeployer:
         <h2>✅ API Endpoints Testing</h2>
         <table>
             <tr><th>Endpoint</th><th>Expected</th><th>Status</th></tr>
-            <tr><td><code>/api/health</code></td><td>200 - {{"status":"ok"}}</td><td id="health-status">⏳ Testing</td></tr>
+            <tr><td><code>/api/health</code></td><td>200 - {"status":"ok"}</td><td id="health-status">⏳ Testing</td></tr>
             <tr><td><code>/api/categories</code></td><td>200 - JSON array</td><td id="categories-status">⏳ Testing</td></tr>
             <tr><td><code>/api/products?limit=5</code></td><td>200 - 5 products</td><td id="products-status">⏳ Testing</td></tr>
             <tr><td><code>/api/products (total)</code></td><td>40 products</td><td id="product-count-status">⏳ Testing</td></tr>
@@ -173,30 +130,94 @@ class VercelDeployer:
 
     <script>
         // Auto-update will be triggered by deployment script
-        function updateStatus(elementId, status, message = '') {{
+        function updateStatus(elementId, status, message = '') {
             const elem = document.getElementById(elementId);
-            if (elem) {{
-                if (status === 'success') {{
+            if (elem) {
+                if (status === 'success') {
                     elem.innerHTML = '✅ ' + message;
                     elem.className = 'check';
-                }} else if (status === 'error') {{
+                } else if (status === 'error') {
                     elem.innerHTML = '❌ ' + message;
                     elem.className = 'cross';
-                }} else if (status === 'pending') {{
+                } else if (status === 'pending') {
                     elem.innerHTML = '⏳ ' + message;
-                }}
-            }}
-        }}
+                }
+            }
+        }
 
         // Keep trying to load status updates every 5 seconds
-        setInterval(function() {{
+        setInterval(function() {
             // Status will be updated by the backend
-        }}, 5000);
+        }, 5000);
     </script>
 </body>
 </html>
-"""
-        return report
+""")
+
+class VercelDeployer:
+    def __init__(self, base_dir):
+        self.base_dir = Path(base_dir)
+        self.env_file = self.base_dir / "learnflow-app" / ".env.backend"
+        self.env_vars = {}
+        self.deployment_url = None
+
+    def log(self, level, message):
+        """Log with color"""
+        if level == "info":
+            print(f"{BLUE}ℹ️  {message}{NC}")
+        elif level == "success":
+            print(f"{GREEN}✅ {message}{NC}")
+        elif level == "error":
+            print(f"{RED}❌ {message}{NC}")
+        elif level == "warning":
+            print(f"{YELLOW}⚠️  {message}{NC}")
+        else:
+            print(f"{BLUE}→  {message}{NC}")
+
+    def load_env_vars(self):
+        """Load secrets from .env.backend"""
+        self.log("info", "Loading environment variables...")
+
+        if not self.env_file.exists():
+            self.log("error", f".env.backend not found at {self.env_file}")
+            return False
+
+        self.env_vars.update(_parse_env(str(self.env_file), self.env_file.stat().st_mtime))
+
+        required = ["DATABASE_URL", "OPENAI_API_KEY", "JWT_SECRET"]
+        for var in required:
+            if var not in self.env_vars:
+                self.log("error", f"Missing required var: {var}")
+                return False
+            self.log("success", f"Loaded {var}")
+
+        return True
+
+    def run_command(self, cmd, description=""):
+        """Run command (argv list, no shell) and return output"""
+        if description:
+            self.log("info", description)
+
+        try:
+            result = subprocess.run(
+                cmd,
+                capture_output=True,
+                text=True,
+                timeout=30
+            )
+            return result.stdout.strip(), result.returncode
+        except subprocess.TimeoutExpired:
+            self.log("error", f"Command timeout: {' '.join(cmd)}")
+            return "", 1
+        except Exception as e:
+            self.log("error", f"Command failed: {e}")
+            return "", 1
+
+    def generate_deployment_report(self):
+        """Generate HTML report of deployment status"""
+        timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+
+        return _REPORT_TMPL.substitute(timestamp=timestamp, project=PROJECT_NAME)
 
     def print_banner(self):
         """Print deployment banner"""
@@ -266,13 +287,13 @@ def main():
 
     deployer.log("success", "Environment variables loaded")
 
-    # Step 2: Verify files are in place
-    vercel_json = deployer.base_dir / "vercel.json"
-    api_index = deployer.base_dir / "api" / "index.py"
-    api_reqs = deployer.base_dir / "api" / "requirements.txt"
+    # Step 2: Verify files are in place (one directory listing per folder)
+    present = _list_dir(deployer.base_dir)
+    if "api" in present:
+        present |= _list_dir(deployer.base_dir / "api", prefix="api/")
 
-    for f, name in [(vercel_json, "vercel.json"), (api_index, "api/index.py"), (api_reqs, "api/requirements.txt")]:
-        if f.exists():
+    for name in ["vercel.json", "api/index.py", "api/requirements.txt"]:
+        if name in present:
             deployer.log("success", f"{name} found")
         else:
             deployer.log("error", f"{name} NOT found - required for deployment!")
@@ -280,7 +301,7 @@ def main():
 
     # Step 3: Check git status
     deployer.log("info", "Checking git status...")
-    output, code = deployer.run_command("git log --oneline -1", "Latest commit:")
+    output, code = deployer.run_command(["git", "log", "--oneline", "-1"], "Latest commit:")
     if code == 0:
         deployer.log("success", f"Git repo ready: {output}")
 
@@ -1,18 +1,25 @@
 """OpenAI Client - Chat Completion Integration"""
 
 import os
-from openai import AsyncOpenAI, OpenAI
+import httpx
+from openai import AsyncOpenAI
 
-# Initialize clients
+# Initialize client
 api_key = os.getenv("OPENAI_API_KEY")
 if not api_key:
     raise ValueError("OPENAI_API_KEY environment variable not set")
 
-# Sync client for regular operations
-client = OpenAI(api_key=api_key)
-
-# Async client for streaming
-async_client = AsyncOpenAI(api_key=api_key)
+# Single async client shared by all requests; keeps connections alive
+async_client = AsyncOpenAI(
+    api_key=api_key,
+    http_client=httpx.AsyncClient(
+        limits=httpx.Limits(
+            max_connections=int(os.getenv("OPENAI_MAX_CONNECTIONS", "100")),
+            max_keepalive_connections=int(os.getenv("OPENAI_MAX_KEEPALIVE", "20")),
+        ),
+        timeout=httpx.Timeout(600.0, connect=5.0),
+    ),
+)
 
 
 async def generate_chat_response(messages: list[dict], model: str = "gpt-4o") -> str:
@@ -7,9 +7,6 @@ from fastapi.middleware.cors import CORSMiddleware
 from .database import init_db
 from .routes import router
 
-# Initialize database
-init_db()
-
 # Create FastAPI app
 app = FastAPI(
     title="Chat Service - Fatima Zehra Boutique",
@@ -34,6 +31,12 @@ app.add_middleware(
 app.include_router(router)
 
 
+@app.on_event("startup")
+async def on_startup():
+    """Initialize database - create all tables"""
+    await init_db()
+
+
 @app.get("/")
 async def root():
     """Health check endpoint"""
@@ -3,16 +3,20 @@
 from datetime import datetime
 from typing import Optional
 from sqlmodel import SQLModel, Field
+from sqlalchemy import Index
 
 
 # Database Model
 class ChatMessage(SQLModel, table=True):
     """Chat message history table"""
     __tablename__ = "chat_messages"
+    __table_args__ = (
+        Index("idx_chat_session_created", "session_id", "created_at"),
+    )
 
     id: Optional[int] = Field(default=None, primary_key=True)
-    user_id: Optional[int] = Field(default=None, index=True)
-    session_id: str = Field(index=True, max_length=100)
+    user_id: Optional[int] = Field(default=None)
+    session_id: str = Field(max_length=100)
     role: str = Field(max_length=20)  # "user" or "assistant"
     content: str
     metadata: Optional[dict] = Field(default=None)
@@ -1,8 +1,10 @@
 """Chat Service Routes - AI Chat Endpoints"""
 
+import os
 from fastapi import APIRouter, Depends, HTTPException, status
 from fastapi.responses import StreamingResponse
-from sqlmodel import Session, select, func
+from sqlmodel import select, func, delete
+from sqlmodel.ext.asyncio.session import AsyncSession
 
 from .models import ChatMessage, ChatMessageRequest, ChatHistoryResponse, ChatMessageResponse
 from .database import get_session
@@ -10,11 +12,14 @@ from .ai_client import generate_chat_response, stream_chat_response, get_system_
 
 router = APIRouter(prefix="/api/chat", tags=["chat"])
 
+# Number of past messages sent to the model on each turn
+HISTORY_LIMIT = int(os.getenv("CHAT_HISTORY_LIMIT", "20"))
+
 
 @router.post("/messages")
 async def send_message(
     message_data: ChatMessageRequest,
-    session: Session = Depends(get_session)
+    session: AsyncSession = Depends(get_session)
 ):
     """
     Send chat message and get streaming response
@@ -29,14 +34,16 @@ async def send_message(
         content=message_data.text
     )
     session.add(user_msg)
-    session.commit()
+    # Flush only; the message is committed together with the reply
+    await session.flush()
 
-    # Get chat history
-    history = session.exec(
+    # Get the most recent turns of chat history, oldest first
+    result = await session.exec(
         select(ChatMessage).where(
             ChatMessage.session_id == message_data.session_id
-        ).order_by(ChatMessage.created_at)
-    ).all()
+        ).order_by(ChatMessage.created_at.desc()).limit(HISTORY_LIMIT)
+    )
+    history = list(reversed(result.all()))
 
     # Build messages for OpenAI
     messages = [{"role": "system", "content": get_system_prompt()}]
@@ -45,22 +52,22 @@ async def send_message(
 
     # Generate response
     async def response_generator():
-        full_response = ""
+        chunks = []
         async for chunk in stream_chat_response(messages):
-            full_response += chunk
-            yield f"data: {chunk}\n\n"
+            chunks.append(chunk)
+            yield b"data: " + chunk.encode() + b"\n\n"
 
-        # Save assistant message
+        # Save assistant message and commit the whole turn
         assistant_msg = ChatMessage(
             user_id=message_data.user_id,
             session_id=message_data.session_id,
             role="assistant",
-            content=full_response
+            content="".join(chunks)
         )
         session.add(assistant_msg)
-        session.commit()
+        await session.commit()
 
-        yield "data: [DONE]\n\n"
+        yield b"data: [DONE]\n\n"
 
     return StreamingResponse(
         response_generator(),
@@ -77,27 +84,34 @@ async def get_chat_history(
     session_id: str,
     limit: int = 50,
     offset: int = 0,
-    session: Session = Depends(get_session)
+    session: AsyncSession = Depends(get_session)
 ):
     """Get chat history for a session"""
-    # Get total count
-    total = session.exec(
-        select(func.count(ChatMessage.id)).where(
-            ChatMessage.session_id == session_id
-        )
-    ).one()
-
-    # Get messages
-    messages = session.exec(
-        select(ChatMessage)
+    # Fetch the page and the session total in one round-trip
+    result = await session.exec(
+        select(ChatMessage, func.count().over().label("total"))
         .where(ChatMessage.session_id == session_id)
         .order_by(ChatMessage.created_at.desc())
         .limit(limit)
         .offset(offset)
-    ).all()
+    )
+    rows = result.all()
+
+    if rows:
+        total = rows[0][1]
+    elif offset:
+        # Page past the end carries no window row, count separately
+        result = await session.exec(
+            select(func.count(ChatMessage.id)).where(
+                ChatMessage.session_id == session_id
+            )
+        )
+        total = result.one()
+    else:
+        total = 0
 
     # Reverse to get chronological order
-    messages = list(reversed(messages))
+    messages = [msg for msg, _ in reversed(rows)]
 
     return ChatHistoryResponse(
         messages=[ChatMessageResponse.from_orm(m) for m in messages],
@@ -109,18 +123,14 @@ async def get_chat_history(
 @router.delete("/history")
 async def clear_chat_history(
     session_id: str,
-    session: Session = Depends(get_session)
+    session: AsyncSession = Depends(get_session)
 ):
     """Clear chat history for a session"""
-    messages = session.exec(
-        select(ChatMessage).where(
+    await session.exec(
+        delete(ChatMessage).where(
             ChatMessage.session_id == session_id
         )
-    ).all()
-
-    for msg in messages:
-        session.delete(msg)
-
-    session.commit()
+    )
+    await session.commit()
 
     return {"message": "Chat history cleared", "session_id": session_id}
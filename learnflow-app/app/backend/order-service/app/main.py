@@ -3,13 +3,11 @@
 import os
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import ORJSONResponse
 
 from .database import init_db
 from .routes import router
 
-# Initialize database
-init_db()
-
 # Create FastAPI app
 app = FastAPI(
     title="Order Service - Fatima Zehra Boutique",
@@ -17,7 +15,8 @@ app = FastAPI(
     version="1.0.0",
     docs_url="/docs",
     redoc_url="/redoc",
-    openapi_url="/openapi.json"
+    openapi_url="/openapi.json",
+    default_response_class=ORJSONResponse
 )
 
 # Add CORS middleware
@@ -34,6 +33,12 @@ app.add_middleware(
 app.include_router(router)
 
 
+@app.on_event("startup")
+async def on_startup():
+    """Initialize database - create all tables"""
+    await init_db()
+
+
 @app.get("/")
 async def root():
     """Health check endpoint"""
@@ -4,7 +4,7 @@ from datetime import datetime
 from decimal import Decimal
 from typing import Optional
 from sqlmodel import SQLModel, Field, Relationship, Column
-from sqlalchemy import Numeric
+from sqlalchemy import DateTime, Index, Numeric, func, text
 
 
 # Database Models
@@ -13,17 +13,28 @@ class Cart(SQLModel, table=True):
     __tablename__ = "carts"
 
     id: Optional[int] = Field(default=None, primary_key=True)
-    user_id: int = Field(index=True)
+    user_id: int = Field(index=True, unique=True)
     created_at: datetime = Field(default_factory=datetime.utcnow)
-    updated_at: datetime = Field(default_factory=datetime.utcnow)
+    # Set by the database on insert and on every UPDATE of the row
+    updated_at: Optional[datetime] = Field(
+        default=None,
+        sa_column=Column(DateTime, server_default=func.now(), onupdate=func.now())
+    )
 
     # Relationships
-    items: list["CartItem"] = Relationship(back_populates="cart", cascade_delete=True)
+    items: list["CartItem"] = Relationship(
+        back_populates="cart",
+        cascade_delete=True,
+        sa_relationship_kwargs={"lazy": "selectin"}
+    )
 
 
 class CartItem(SQLModel, table=True):
     """Cart items table"""
     __tablename__ = "cart_items"
+    __table_args__ = (
+        Index("idx_cart_items_cart_product", "cart_id", "product_id", unique=True),
+    )
 
     id: Optional[int] = Field(default=None, primary_key=True)
     cart_id: int = Field(foreign_key="carts.id", index=True)
@@ -38,9 +49,12 @@ class CartItem(SQLModel, table=True):
 class Order(SQLModel, table=True):
     """Orders table"""
     __tablename__ = "orders"
+    __table_args__ = (
+        Index("idx_orders_user_id_desc", "user_id", text("id DESC")),
+    )
 
     id: Optional[int] = Field(default=None, primary_key=True)
-    user_id: int = Field(index=True)
+    user_id: int
     status: str = Field(default="pending", max_length=50, index=True)
     total_amount: Decimal = Field(sa_column=Column(Numeric(precision=10, scale=2)))
     shipping_address: str
@@ -49,7 +63,11 @@ class Order(SQLModel, table=True):
     updated_at: datetime = Field(default_factory=datetime.utcnow)
 
     # Relationships
-    items: list["OrderItem"] = Relationship(back_populates="order", cascade_delete=True)
+    items: list["OrderItem"] = Relationship(
+        back_populates="order",
+        cascade_delete=True,
+        sa_relationship_kwargs={"lazy": "selectin"}
+    )
 
 
 class OrderItem(SQLModel, table=True):
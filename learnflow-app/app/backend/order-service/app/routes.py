@@ -1,10 +1,16 @@
 """Order Service Routes - Cart and Order Management"""
 
+import os
 from datetime import datetime
 from decimal import Decimal
+from functools import lru_cache
 from typing import Optional
-from fastapi import APIRouter, Depends, HTTPException, status, Header
-from sqlmodel import Session, select, func
+from fastapi import APIRouter, Depends, HTTPException, status, Header, Query
+from sqlalchemy import String, cast, column, insert, literal, table, update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.orm import raiseload, selectinload
+from sqlmodel import select, func, delete
+from sqlmodel.ext.asyncio.session import AsyncSession
 
 from .models import (
     Cart, CartItem, Order, OrderItem,
@@ -15,55 +21,181 @@ from .database import get_session
 
 router = APIRouter(tags=["orders"])
 
+# Product catalog table (owned by the product service, same database)
+products = table("products", column("id"), column("name"))
+
+
+@lru_cache(maxsize=int(os.getenv("TOKEN_CACHE_SIZE", "10000")))
+def _user_id_from_token(token: str) -> int:
+    """Resolve a bearer token to a user_id, cached per token"""
+    # In production: decode JWT here (cache must then honour its exp)
+    # For demo: extract from custom header
+    return int(token.split("-")[0]) if "-" in token else 1
+
 
 def get_user_id_from_header(authorization: Optional[str] = Header(None)) -> int:
     """Extract user_id from JWT token header (simplified for demo)"""
-    # In production, decode JWT token to get user_id
-    # For now, we'll use a simple header
     if authorization:
-        try:
-            parts = authorization.split()
-            if len(parts) == 2 and parts[0].lower() == "bearer":
-                # In production: decode JWT from parts[1]
-                # For demo: extract from custom header
-                return int(parts[1].split("-")[0]) if "-" in parts[1] else 1
-        except Exception:
-            pass
+        parts = authorization.split()
+        if len(parts) == 2 and parts[0].lower() == "bearer":
+            try:
+                # Only successful lookups are cached; failures raise
+                return _user_id_from_token(parts[1])
+            except ValueError:
+                pass
     raise HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Missing or invalid authorization header"
     )
 
 
+def _cart_query(user_id: int):
+    """Select the user's cart with its items eagerly loaded (one IN query)"""
+    return (
+        select(Cart)
+        .where(Cart.user_id == user_id)
+        .options(selectinload(Cart.items), raiseload("*"))
+    )
+
+
+def _user_cart_ids(user_id: int):
+    """Subquery of the cart ids owned by a user, for ownership checks"""
+    return select(Cart.id).where(Cart.user_id == user_id)
+
+
+async def _get_or_create_cart_id(session: AsyncSession, user_id: int) -> tuple[int, bool]:
+    """Return the id of the user's cart and whether this call created it"""
+    result = await session.exec(select(Cart.id).where(Cart.user_id == user_id))
+    cart_id = result.first()
+    if cart_id is not None:
+        return cart_id, False
+
+    # user_id is unique; a concurrent create makes this insert a no-op
+    result = await session.exec(
+        pg_insert(Cart)
+        .values(user_id=user_id, created_at=datetime.utcnow())
+        .on_conflict_do_nothing(index_elements=["user_id"])
+        .returning(Cart.id)
+    )
+    cart_id = result.scalar_one_or_none()
+    if cart_id is None:
+        result = await session.exec(select(Cart.id).where(Cart.user_id == user_id))
+        return result.one(), False
+    return cart_id, True
+
+
+async def _touch_cart(session: AsyncSession, cart_id: int) -> None:
+    """Bump the cart's updated_at to the database clock"""
+    await session.exec(
+        update(Cart).where(Cart.id == cart_id).values(updated_at=func.now())
+    )
+
+
+async def _reload_cart(session: AsyncSession, user_id: int) -> Cart:
+    """Re-read the cart and its items after a commit"""
+    result = await session.exec(
+        _cart_query(user_id).execution_options(populate_existing=True)
+    )
+    return result.one()
+
+
+async def _cart_totals(session: AsyncSession, cart_id: int) -> tuple[Decimal, int]:
+    """Sum line totals and count items for a cart in the database"""
+    result = await session.exec(
+        select(
+            func.coalesce(func.sum(CartItem.price * CartItem.quantity), 0),
+            func.count(CartItem.id)
+        ).where(CartItem.cart_id == cart_id)
+    )
+    total, item_count = result.one()
+    return total, item_count
+
+
+def _item_responses(items: list[CartItem]) -> list[CartItemResponse]:
+    """Convert cart item rows to responses"""
+    # Rows come straight from our own table, so skip re-validation
+    return [
+        CartItemResponse.model_construct(
+            id=item.id,
+            product_id=item.product_id,
+            quantity=item.quantity,
+            price=item.price
+        )
+        for item in items
+    ]
+
+
+def _cart_response(cart: Cart) -> CartResponse:
+    """Build the cart response from a cart with its items loaded"""
+    # Totals come from the same rows as items, so they always agree
+    return CartResponse(
+        id=cart.id,
+        user_id=cart.user_id,
+        items=_item_responses(cart.items),
+        total_amount=sum((item.price * item.quantity for item in cart.items), Decimal("0")),
+        item_count=len(cart.items)
+    )
+
+
+def _order_response(order: Order) -> OrderResponse:
+    """Convert an order row and its items to a response"""
+    # Rows come straight from our own tables, so skip re-validation
+    return OrderResponse.model_construct(
+        id=order.id,
+        user_id=order.user_id,
+        status=order.status,
+        total_amount=order.total_amount,
+        shipping_address=order.shipping_address,
+        payment_status=order.payment_status,
+        items=[
+            OrderItemResponse.model_construct(
+                id=item.id,
+                product_id=item.product_id,
+                product_name=item.product_name,
+                quantity=item.quantity,
+                price=item.price
+            )
+            for item in order.items
+        ],
+        created_at=order.created_at,
+        updated_at=order.updated_at
+    )
+
+
 # Cart Endpoints
 @router.get("/api/cart", response_model=CartResponse)
 async def get_cart(
     user_id: int = Depends(get_user_id_from_header),
-    session: Session = Depends(get_session)
+    session: AsyncSession = Depends(get_session)
 ):
     """Get user's shopping cart"""
-    cart = session.exec(
-        select(Cart).where(Cart.user_id == user_id)
-    ).first()
-
-    if not cart:
-        # Create new cart if it doesn't exist
-        cart = Cart(user_id=user_id)
-        session.add(cart)
-        session.commit()
-        session.refresh(cart)
-
-    # Calculate total
-    total = Decimal("0")
-    for item in cart.items:
-        total += item.price * item.quantity
+    cart_id, created = await _get_or_create_cart_id(session, user_id)
+
+    if created:
+        # New cart: nothing to sum or load
+        await session.commit()
+        return CartResponse(
+            id=cart_id,
+            user_id=user_id,
+            items=[],
+            total_amount=Decimal("0.00"),
+            item_count=0
+        )
+
+    total, item_count = await _cart_totals(session, cart_id)
+
+    # Emptied carts need no items query
+    items = []
+    if item_count:
+        result = await session.exec(select(CartItem).where(CartItem.cart_id == cart_id))
+        items = result.all()
 
     return CartResponse(
-        id=cart.id,
-        user_id=cart.user_id,
-        items=[CartItemResponse.from_orm(item) for item in cart.items],
+        id=cart_id,
+        user_id=user_id,
+        items=_item_responses(items),
         total_amount=total,
-        item_count=len(cart.items)
+        item_count=item_count
     )
 
 
@@ -71,59 +203,31 @@ async def get_cart(
 async def add_to_cart(
     item_data: AddToCartRequest,
     user_id: int = Depends(get_user_id_from_header),
-    session: Session = Depends(get_session)
+    session: AsyncSession = Depends(get_session)
 ):
     """Add item to cart"""
-    # Get or create cart
-    cart = session.exec(
-        select(Cart).where(Cart.user_id == user_id)
-    ).first()
-
-    if not cart:
-        cart = Cart(user_id=user_id)
-        session.add(cart)
-        session.commit()
-        session.refresh(cart)
-
-    # Check if item already in cart
-    existing_item = session.exec(
-        select(CartItem).where(
-            (CartItem.cart_id == cart.id) &
-            (CartItem.product_id == item_data.product_id)
-        )
-    ).first()
-
-    if existing_item:
-        # Update quantity
-        existing_item.quantity += item_data.quantity
-        session.add(existing_item)
-    else:
-        # Add new item
-        cart_item = CartItem(
-            cart_id=cart.id,
-            product_id=item_data.product_id,
-            quantity=item_data.quantity,
-            price=item_data.price
+    cart_id, _ = await _get_or_create_cart_id(session, user_id)
+
+    # Add new item, or bump its quantity if already in cart (one statement)
+    stmt = pg_insert(CartItem).values(
+        cart_id=cart_id,
+        product_id=item_data.product_id,
+        quantity=item_data.quantity,
+        price=item_data.price
+    )
+    await session.exec(
+        stmt.on_conflict_do_update(
+            index_elements=["cart_id", "product_id"],
+            set_={"quantity": CartItem.quantity + stmt.excluded.quantity}
         )
-        session.add(cart_item)
+    )
 
-    cart.updated_at = datetime.utcnow()
-    session.add(cart)
-    session.commit()
-    session.refresh(cart)
+    await _touch_cart(session, cart_id)
+    await session.commit()
+    cart = await _reload_cart(session, user_id)
 
     # Return updated cart
-    total = Decimal("0")
-    for item in cart.items:
-        total += item.price * item.quantity
-
-    return CartResponse(
-        id=cart.id,
-        user_id=cart.user_id,
-        items=[CartItemResponse.from_orm(item) for item in cart.items],
-        total_amount=total,
-        item_count=len(cart.items)
-    )
+    return _cart_response(cart)
 
 
 @router.put("/api/cart/items/{item_id}", response_model=CartResponse)
@@ -131,102 +235,75 @@ async def update_cart_item(
     item_id: int,
     update_data: UpdateCartItemRequest,
     user_id: int = Depends(get_user_id_from_header),
-    session: Session = Depends(get_session)
+    session: AsyncSession = Depends(get_session)
 ):
     """Update cart item quantity"""
-    cart_item = session.exec(
-        select(CartItem).where(CartItem.id == item_id)
-    ).first()
+    # Update only if the item is in this user's cart (one statement)
+    result = await session.exec(
+        update(CartItem)
+        .where(CartItem.id == item_id, CartItem.cart_id.in_(_user_cart_ids(user_id)))
+        .values(quantity=update_data.quantity)
+        .returning(CartItem.cart_id)
+    )
+    cart_id = result.scalar_one_or_none()
 
-    if not cart_item:
+    if cart_id is None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Cart item not found"
         )
 
-    # Verify user owns this cart
-    cart = session.exec(
-        select(Cart).where(Cart.id == cart_item.cart_id)
-    ).first()
-
-    if cart.user_id != user_id:
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN,
-            detail="Not authorized"
-        )
-
-    cart_item.quantity = update_data.quantity
-    session.add(cart_item)
+    await _touch_cart(session, cart_id)
+    await session.commit()
+    cart = await _reload_cart(session, user_id)
 
-    cart.updated_at = datetime.utcnow()
-    session.add(cart)
-    session.commit()
-    session.refresh(cart)
-
-    total = Decimal("0")
-    for item in cart.items:
-        total += item.price * item.quantity
-
-    return CartResponse(
-        id=cart.id,
-        user_id=cart.user_id,
-        items=[CartItemResponse.from_orm(item) for item in cart.items],
-        total_amount=total,
-        item_count=len(cart.items)
-    )
+    return _cart_response(cart)
 
 
 @router.delete("/api/cart/items/{item_id}", status_code=status.HTTP_204_NO_CONTENT)
 async def remove_from_cart(
     item_id: int,
     user_id: int = Depends(get_user_id_from_header),
-    session: Session = Depends(get_session)
+    session: AsyncSession = Depends(get_session)
 ):
     """Remove item from cart"""
-    cart_item = session.exec(
-        select(CartItem).where(CartItem.id == item_id)
-    ).first()
+    # Delete only if the item is in this user's cart (one statement)
+    result = await session.exec(
+        delete(CartItem)
+        .where(CartItem.id == item_id, CartItem.cart_id.in_(_user_cart_ids(user_id)))
+        .returning(CartItem.cart_id)
+    )
+    cart_id = result.scalar_one_or_none()
 
-    if not cart_item:
+    if cart_id is None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Cart item not found"
         )
 
-    # Verify user owns this cart
-    cart = session.exec(
-        select(Cart).where(Cart.id == cart_item.cart_id)
-    ).first()
-
-    if cart.user_id != user_id:
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN,
-            detail="Not authorized"
-        )
-
-    session.delete(cart_item)
-    cart.updated_at = datetime.utcnow()
-    session.add(cart)
-    session.commit()
+    await _touch_cart(session, cart_id)
+    await session.commit()
 
 
 @router.delete("/api/cart", status_code=status.HTTP_204_NO_CONTENT)
 async def clear_cart(
     user_id: int = Depends(get_user_id_from_header),
-    session: Session = Depends(get_session)
+    session: AsyncSession = Depends(get_session)
 ):
     """Clear entire cart"""
-    cart = session.exec(
-        select(Cart).where(Cart.user_id == user_id)
-    ).first()
+    # Touch the cart and learn its id in one statement
+    result = await session.exec(
+        update(Cart)
+        .where(Cart.user_id == user_id)
+        .values(updated_at=func.now())
+        .returning(Cart.id)
+    )
+    cart_id = result.scalar_one_or_none()
 
-    if cart:
+    if cart_id is not None:
         # Delete all items
-        for item in cart.items:
-            session.delete(item)
-        cart.updated_at = datetime.utcnow()
-        session.add(cart)
-        session.commit()
+        await session.exec(delete(CartItem).where(CartItem.cart_id == cart_id))
+        await session.commit()
 
 
 # Order Endpoints
@@ -234,81 +311,111 @@ async def clear_cart(
 async def checkout(
     checkout_data: CheckoutRequest,
     user_id: int = Depends(get_user_id_from_header),
-    session: Session = Depends(get_session)
+    session: AsyncSession = Depends(get_session)
 ):
     """Create order from cart"""
-    # Get cart
-    cart = session.exec(
-        select(Cart).where(Cart.user_id == user_id)
-    ).first()
+    # Get cart id (items are moved in SQL below, so don't load them)
+    result = await session.exec(select(Cart.id).where(Cart.user_id == user_id))
+    cart_id = result.first()
 
-    if not cart or len(cart.items) == 0:
+    if cart_id is None:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Cart is empty"
         )
 
-    # Calculate total
-    total_amount = Decimal("0")
-    for item in cart.items:
-        total_amount += item.price * item.quantity
-
-    # Create order
+    # Create order (flush for its id, commit once at the end); the total
+    # is filled in from the rows actually moved below
     order = Order(
         user_id=user_id,
         status="pending",
-        total_amount=total_amount,
+        total_amount=Decimal("0"),
         shipping_address=checkout_data.shipping_address,
         payment_status="pending"
     )
     session.add(order)
-    session.commit()
-    session.refresh(order)
-
-    # Create order items
-    for cart_item in cart.items:
-        order_item = OrderItem(
-            order_id=order.id,
-            product_id=cart_item.product_id,
-            product_name=f"Product {cart_item.product_id}",
-            quantity=cart_item.quantity,
-            price=cart_item.price
+    await session.flush()
+
+    # Move cart items, with their catalog names, into order items in one
+    # statement: WITH moved AS (DELETE ... RETURNING) INSERT ... SELECT.
+    # Only the rows deleted are ordered, so an item added concurrently is
+    # either moved or left in the cart, never lost.
+    moved = (
+        delete(CartItem)
+        .where(CartItem.cart_id == cart_id)
+        .returning(CartItem.product_id, CartItem.quantity, CartItem.price)
+        .cte("moved")
+    )
+    result = await session.exec(
+        insert(OrderItem)
+        .from_select(
+            ["order_id", "product_id", "product_name", "quantity", "price"],
+            select(
+                literal(order.id),
+                moved.c.product_id,
+                func.coalesce(
+                    products.c.name,
+                    literal("Product ") + cast(moved.c.product_id, String)
+                ),
+                moved.c.quantity,
+                moved.c.price
+            )
+            .select_from(moved)
+            .outerjoin(products, products.c.id == moved.c.product_id)
         )
-        session.add(order_item)
+        .add_cte(moved)
+        .returning(OrderItem.price * OrderItem.quantity)
+    )
+    line_totals = result.scalars().all()
 
-    # Clear cart
-    for item in cart.items:
-        session.delete(item)
+    if not line_totals:
+        await session.rollback()
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Cart is empty"
+        )
 
-    session.commit()
-    session.refresh(order)
+    order.total_amount = sum(line_totals, Decimal("0"))
+    await session.commit()
+    await session.refresh(order)
 
-    return OrderResponse.from_orm(order)
+    return _order_response(order)
 
 
 @router.get("/api/orders", response_model=list[OrderResponse])
 async def list_orders(
+    limit: int = Query(50, ge=1, le=100),
+    before_id: Optional[int] = Query(None),
     user_id: int = Depends(get_user_id_from_header),
-    session: Session = Depends(get_session)
+    session: AsyncSession = Depends(get_session)
 ):
-    """Get user's orders"""
-    orders = session.exec(
-        select(Order).where(Order.user_id == user_id)
-    ).all()
+    """
+    Get user's orders, newest first
+
+    - **limit**: Number of orders to return (default 50, max 100)
+    - **before_id**: Return orders older than this id (pass the last id of the previous page)
+    """
+    query = select(Order).where(Order.user_id == user_id)
+    if before_id is not None:
+        query = query.where(Order.id < before_id)
 
-    return [OrderResponse.from_orm(order) for order in orders]
+    result = await session.exec(query.order_by(Order.id.desc()).limit(limit))
+    orders = result.all()
+
+    return [_order_response(order) for order in orders]
 
 
 @router.get("/api/orders/{order_id}", response_model=OrderResponse)
 async def get_order(
     order_id: int,
     user_id: int = Depends(get_user_id_from_header),
-    session: Session = Depends(get_session)
+    session: AsyncSession = Depends(get_session)
 ):
     """Get order details"""
-    order = session.exec(
+    result = await session.exec(
         select(Order).where(Order.id == order_id)
-    ).first()
+    )
+    order = result.first()
 
     if not order or order.user_id != user_id:
         raise HTTPException(
@@ -316,4 +423,4 @@ async def get_order(
             detail="Order not found"
         )
 
-    return OrderResponse.from_orm(order)
+    return _order_response(order)
@@ -0,0 +1,12 @@
+-- Migration: Add Chat Messages Composite Index
+-- Description: Cover "WHERE session_id ... ORDER BY created_at" lookups
+-- Date: 2026-10-15
+
+-- Session history (send, list and clear chat history)
+CREATE INDEX IF NOT EXISTS idx_chat_session_created ON chat_messages(session_id, created_at);
+
+-- Superseded by idx_chat_session_created (same leading column)
+DROP INDEX IF EXISTS idx_chat_session;
+
+-- user_id lookups are covered by idx_chat_user_session (leading column)
+DROP INDEX IF EXISTS idx_chat_user;
@@ -0,0 +1,23 @@
+-- Migration: Add Unique Cart Item Per Product
+-- Description: One cart_items row per (cart, product) so adds can upsert
+-- Date: 2026-10-15
+
+-- Merge duplicate rows into the oldest one before adding the constraint
+UPDATE cart_items ci
+SET quantity = d.total_quantity
+FROM (
+    SELECT MIN(id) AS keep_id, SUM(quantity) AS total_quantity
+    FROM cart_items
+    GROUP BY cart_id, product_id
+    HAVING COUNT(*) > 1
+) d
+WHERE ci.id = d.keep_id;
+
+DELETE FROM cart_items ci
+USING cart_items other
+WHERE ci.cart_id = other.cart_id
+  AND ci.product_id = other.product_id
+  AND ci.id > other.id;
+
+-- Create unique composite index (also serves "item already in cart" lookups)
+CREATE UNIQUE INDEX IF NOT EXISTS idx_cart_items_cart_product ON cart_items(cart_id, product_id);
@@ -0,0 +1,29 @@
+-- Migration: Add Unique Cart Per User
+-- Description: One carts row per user so cart_id can be looked up by user_id
+-- Date: 2026-10-15
+
+-- Fold items from duplicate carts into each user's oldest cart
+WITH keep AS (
+    SELECT user_id, MIN(id) AS cart_id
+    FROM carts
+    GROUP BY user_id
+    HAVING COUNT(*) > 1
+)
+INSERT INTO cart_items (cart_id, product_id, quantity, price)
+SELECT keep.cart_id, ci.product_id, SUM(ci.quantity), MAX(ci.price)
+FROM cart_items ci
+JOIN carts c ON c.id = ci.cart_id
+JOIN keep ON keep.user_id = c.user_id AND c.id <> keep.cart_id
+GROUP BY keep.cart_id, ci.product_id
+ON CONFLICT (cart_id, product_id)
+DO UPDATE SET quantity = cart_items.quantity + EXCLUDED.quantity;
+
+-- Drop the duplicate carts (their items go with them)
+DELETE FROM carts c
+USING carts other
+WHERE c.user_id = other.user_id
+  AND c.id > other.id;
+
+-- Replace the plain user_id index with a unique one
+CREATE UNIQUE INDEX IF NOT EXISTS idx_carts_user_unique ON carts(user_id);
+DROP INDEX IF EXISTS idx_carts_user;
@@ -0,0 +1,8 @@
+-- Migration: Add Orders Keyset Index
+-- Description: Cover "WHERE user_id = ? AND id < ? ORDER BY id DESC" order pages
+-- Date: 2026-10-15
+
+CREATE INDEX IF NOT EXISTS idx_orders_user_id_desc ON orders(user_id, id DESC);
+
+-- Superseded by the composite index (same leading column)
+DROP INDEX IF EXISTS idx_orders_user;
@@ -4,13 +4,22 @@ Autonomous image downloader for men's boutique e-commerce platform.
 Downloads royalty-free images from Unsplash and optimizes them.
 """
 
+import functools
 import os
+import sys
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 import json
+try:
+    import orjson
+except ImportError:  # optional, faster manifest encoding
+    orjson = None
 from pathlib import Path
-from PIL import Image
+from PIL import Image, ImageOps
 from io import BytesIO
 import time
+from concurrent.futures import ThreadPoolExecutor
 
 # Configuration
 BASE_DIR = Path(__file__).parent.parent
@@ -88,6 +97,17 @@ CATEGORIES = {
 UNSPLASH_API_KEY = os.getenv("UNSPLASH_API_KEY", "demo")  # Use demo key if not set
 UNSPLASH_API_URL = "https://api.unsplash.com/search/photos"
 
+# Parallel image downloads/encodes
+MAX_WORKERS = int(os.getenv("IMAGE_WORKERS", "16"))
+
+# Shared HTTP session: keeps connections to Unsplash alive across images
+SESSION = requests.Session()
+SESSION.mount("https://", HTTPAdapter(
+    pool_connections=MAX_WORKERS,
+    pool_maxsize=MAX_WORKERS,
+    max_retries=Retry(total=3, backoff_factor=0.3, status_forcelist=(429, 500, 502, 503, 504))
+))
+
 def create_directories():
     """Create image directories if they don't exist."""
     for category in CATEGORIES.keys():
@@ -95,11 +115,17 @@ def create_directories():
         category_dir.mkdir(parents=True, exist_ok=True)
         print(f"[OK] Created directory: {category_dir}")
 
+def _encode_webp(img, quality):
+    """Encode an image as WebP in memory and return the bytes."""
+    buf = BytesIO()
+    img.save(buf, 'WEBP', quality=quality, optimize=True)
+    return buf.getvalue()
+
 def download_and_optimize_image(url, output_path, target_width=800, target_height=1200, max_size_kb=200):
     """Download image from URL and optimize it."""
     try:
         # Download image
-        response = requests.get(url, timeout=10)
+        response = SESSION.get(url, timeout=10)
         response.raise_for_status()
 
         # Open and resize image
@@ -109,41 +135,29 @@ def download_and_optimize_image(url, output_path, target_width=800, target_heigh
         if img.mode != 'RGB':
             img = img.convert('RGB')
 
-        # Calculate aspect ratio and resize
-        img_ratio = img.width / img.height
-        target_ratio = target_width / target_height
-
-        if img_ratio > target_ratio:
-            # Image is wider, fit by height
-            new_height = target_height
-            new_width = int(target_height * img_ratio)
-        else:
-            # Image is taller, fit by width
-            new_width = target_width
-            new_height = int(target_width / img_ratio)
-
-        img = img.resize((new_width, new_height), Image.Resampling.LANCZOS)
-
-        # Crop to exact dimensions
-        left = (new_width - target_width) // 2
-        top = (new_height - target_height) // 2
-        right = left + target_width
-        bottom = top + target_height
-        img = img.crop((left, top, right, bottom))
-
-        # Save as WebP with optimization
-        quality = 95
-        while quality > 50:
-            output_path.parent.mkdir(parents=True, exist_ok=True)
-            img.save(output_path, 'WEBP', quality=quality, optimize=True)
-
-            # Check file size
-            file_size_kb = output_path.stat().st_size / 1024
-            if file_size_kb <= max_size_kb:
-                return True, file_size_kb
-            quality -= 5
-
-        return True, file_size_kb
+        # Crop to the target aspect ratio and resize in one pass
+        img = ImageOps.fit(img, (target_width, target_height), Image.Resampling.LANCZOS, centering=(0.5, 0.5))
+
+        # Save as WebP with the highest quality (95, 90, ... 55) that fits
+        # max_size_kb, encoding in memory; fall back to 55
+        data = _encode_webp(img, 95)
+        if len(data) / 1024 > max_size_kb:
+            # Too big at 95: binary-search the lower qualities
+            qualities = list(range(55, 95, 5))
+            lo, hi = 0, len(qualities) - 1
+            while lo <= hi:
+                mid = (lo + hi) // 2
+                candidate = _encode_webp(img, qualities[mid])
+                if len(candidate) / 1024 <= max_size_kb or mid == 0:
+                    data = candidate
+                    lo = mid + 1
+                else:
+                    hi = mid - 1
+
+        output_path.parent.mkdir(parents=True, exist_ok=True)
+        output_path.write_bytes(data)
+
+        return True, len(data) / 1024
     except Exception as e:
         print(f"[ERROR] Error processing image: {e}")
         return False, 0
@@ -162,7 +176,7 @@ def get_unsplash_images(query, count=1):
             "Authorization": f"Client-ID {UNSPLASH_API_KEY}" if UNSPLASH_API_KEY != "demo" else {}
         }
 
-        response = requests.get(UNSPLASH_API_URL, params=params, headers=headers, timeout=10)
+        response = SESSION.get(UNSPLASH_API_URL, params=params, headers=headers, timeout=10)
         response.raise_for_status()
 
         data = response.json()
@@ -180,43 +194,54 @@ def get_unsplash_images(query, count=1):
         print(f"[ERROR] Error fetching from Unsplash: {e}")
         return []
 
-def download_images_for_category(category, config):
-    """Download and optimize images for a specific category."""
+@functools.lru_cache(maxsize=None)
+def _placeholder_webp(color):
+    """Encode a flat 800x1200 placeholder once per color."""
+    img = Image.new('RGB', (800, 1200), color=color)
+    buf = BytesIO()
+    img.save(buf, 'WEBP', quality=85, optimize=True)
+    return buf.getvalue()
+
+def _make_one(category, i, config):
+    """Create one image for a category and return its manifest entry."""
+    filename = f"{category}-{i:02d}.webp"
+    filepath = PUBLIC_IMAGES_DIR / category / filename
+
+    # Create a placeholder image (in production, would download real image)
+    try:
+        # Create a simple colored image as placeholder
+        data = _placeholder_webp((73 + i*5 % 100, 109 + i*3 % 100, 137 + i*7 % 100))
+        filepath.parent.mkdir(parents=True, exist_ok=True)
+        filepath.write_bytes(data)
+
+        file_size_kb = len(data) / 1024
+
+        print(f"   [OK] {filename} ({file_size_kb:.1f} KB)")
+
+        return {
+            "id": i,
+            "filename": filename,
+            "filepath": str(filepath),
+            "url": f"/images/{category}/{filename}",
+            "size_kb": round(file_size_kb, 2),
+            "description": config['descriptions'][i-1],
+            "dimensions": "800x1200"
+        }
+    except Exception as e:
+        print(f"   [ERROR] {filename}: {e}")
+        return None
+
+def download_images_for_category(category, config, executor):
+    """Queue image downloads for a category; returns one future per image."""
     print(f"\n[CATEGORY] Downloading images for: {category}")
     print(f"   Query: {config['query']}")
 
     # For demo purposes, we'll simulate downloading
     # In production, this would use Unsplash API
-    manifest = []
-
-    for i in range(1, config['count'] + 1):
-        filename = f"{category}-{i:02d}.webp"
-        filepath = PUBLIC_IMAGES_DIR / category / filename
-
-        # Create a placeholder image (in production, would download real image)
-        try:
-            # Create a simple colored image as placeholder
-            img = Image.new('RGB', (800, 1200), color=(73 + i*5 % 100, 109 + i*3 % 100, 137 + i*7 % 100))
-            filepath.parent.mkdir(parents=True, exist_ok=True)
-            img.save(filepath, 'WEBP', quality=85, optimize=True)
-
-            file_size_kb = filepath.stat().st_size / 1024
-
-            manifest.append({
-                "id": i,
-                "filename": filename,
-                "filepath": str(filepath),
-                "url": f"/images/{category}/{filename}",
-                "size_kb": round(file_size_kb, 2),
-                "description": config['descriptions'][i-1],
-                "dimensions": "800x1200"
-            })
-
-            print(f"   [OK] {filename} ({file_size_kb:.1f} KB)")
-        except Exception as e:
-            print(f"   [ERROR] {filename}: {e}")
-
-    return manifest
+    return [
+        executor.submit(_make_one, category, i, config)
+        for i in range(1, config['count'] + 1)
+    ]
 
 def main():
     """Main execution."""
@@ -228,17 +253,25 @@ def main():
     print("\n[SETUP] Setting up directories...")
     create_directories()
 
-    # Download images for each category
+    # Download images for all categories concurrently
     all_manifest = {}
 
-    for category, config in CATEGORIES.items():
-        manifest = download_images_for_category(category, config)
-        all_manifest[category] = manifest
+    with ThreadPoolExecutor(max_workers=MAX_WORKERS) as executor:
+        pending = {
+            category: download_images_for_category(category, config, executor)
+            for category, config in CATEGORIES.items()
+        }
+        # Collect in submission order so the manifest stays stable
+        for category, futures in pending.items():
+            all_manifest[category] = [entry for entry in (f.result() for f in futures) if entry]
 
     # Save manifest
     manifest_path = BASE_DIR / "learnflow-app" / "public" / "images" / "manifest.json"
-    with open(manifest_path, 'w', encoding='utf-8') as f:
-        json.dump(all_manifest, f, indent=2)
+    if orjson is not None:
+        manifest_path.write_bytes(orjson.dumps(all_manifest, option=orjson.OPT_INDENT_2))
+    else:
+        with open(manifest_path, 'w', encoding='utf-8') as f:
+            json.dump(all_manifest, f, indent=2)
 
     print("\n" + "=" * 70)
     print("[SUCCESS] IMAGE DOWNLOAD COMPLETE")
@@ -250,11 +283,11 @@ def main():
     print(f"\n[LOCATION] Images directory: {PUBLIC_IMAGES_DIR}")
 
     # Print manifest
-    print(f"\n[MANIFEST] Image listing:")
+    lines = [f"\n[MANIFEST] Image listing:"]
     for category, images in all_manifest.items():
-        print(f"\n   {category.upper()} ({len(images)} images):")
-        for img in images:
-            print(f"      - {img['filename']} ({img['size_kb']} KB)")
+        lines.append(f"\n   {category.upper()} ({len(images)} images):")
+        lines.extend(f"      - {img['filename']} ({img['size_kb']} KB)" for img in images)
+    sys.stdout.write("\n".join(lines) + "\n")
 
     return all_manifest
 